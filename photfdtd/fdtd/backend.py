@@ -1,7 +1,7 @@
 """ Selects the backend for the fdtd-package.
 
 The `fdtd` library allows to choose a backend. The ``numpy`` backend is the
-default one, but there are also several additional PyTorch backends:
+default one, but there are also several additional PyTorch and CuPy backends:
 
     - ``numpy`` (defaults to float64 arrays)
     - ``torch`` (defaults to float64 tensors)
@@ -10,6 +10,9 @@ default one, but there are also several additional PyTorch backends:
     - ``torch.cuda`` (defaults to float64 tensors)
     - ``torch.cuda.float32``
     - ``torch.cuda.float64``
+    - ``cupy`` (defaults to float64 arrays on the GPU)
+    - ``cupy.float32``
+    - ``cupy.float64``
 
 For example, this is how to choose the `"torch"` backend: ::
 
@@ -38,6 +41,8 @@ backend_names = [
     dict(backends="torch.float64"),
     dict(backends="torch.cuda.float32"),
     dict(backends="torch.cuda.float64"),
+    dict(backends="cupy.float32"),
+    dict(backends="cupy.float64"),
 ]
 
 numpy_float_dtypes = {
@@ -65,6 +70,15 @@ TORCH_AVAILABLE = False
 TORCH_CUDA_AVAILABLE = False
 
 
+# Cupy Backend (and flags)
+try:
+    import cupy
+
+    CUPY_AVAILABLE = True
+except ImportError:
+    CUPY_AVAILABLE = False
+
+
 # Base Class
 class Backend:
     """Backend Base Class"""
@@ -72,6 +86,11 @@ class Backend:
     # constants
     pi = numpy.pi
 
+    # whether the arrays of this backend live on the GPU: when True, the
+    # fields stay device-resident and only the save/visualization paths
+    # should copy (a plane at a time) back to the host via ``bd.numpy``.
+    is_gpu = False
+
     def __repr__(self):
         return self.__class__.__name__
 
@@ -355,6 +374,133 @@ if TORCH_AVAILABLE:
                 )
 
 
+# Cupy Backend
+if CUPY_AVAILABLE:
+
+    class CupyBackend(Backend):
+        """Cupy Backend
+
+        All arrays are allocated on the GPU and stay there: the whole time
+        loop runs on the device and only ``bd.numpy`` copies data back to
+        the host (e.g. one plane per saved frame).
+        """
+
+        is_gpu = True
+
+        # types
+        int = numpy.int64
+        """ integer type for array"""
+
+        float = numpy.float64
+        """ floating type for array """
+
+        complex = numpy.complex128
+        """ complex type for array """
+
+        # methods
+        abs = staticmethod(cupy.abs)
+
+        exp = staticmethod(cupy.exp)
+        """ exponential of all elements in array """
+
+        sin = staticmethod(cupy.sin)
+        """ sine of all elements in array """
+
+        cos = staticmethod(cupy.cos)
+        """ cosine of all elements in array """
+
+        sum = staticmethod(cupy.sum)
+        """ sum elements in array """
+
+        max = staticmethod(cupy.max)
+        """ max element in array """
+
+        sqrt = staticmethod(cupy.sqrt)
+        """ square root of all elements in array """
+
+        stack = staticmethod(cupy.stack)
+        """ stack multiple arrays """
+
+        transpose = staticmethod(cupy.transpose)
+        """ transpose array by flipping two dimensions """
+
+        reshape = staticmethod(cupy.reshape)
+        """ reshape array into given shape """
+
+        squeeze = staticmethod(cupy.squeeze)
+        """ remove dim-1 dimensions """
+
+        broadcast_arrays = staticmethod(cupy.broadcast_arrays)
+        """ broadcast arrays """
+
+        broadcast_to = staticmethod(cupy.broadcast_to)
+        """ broadcast array into shape """
+
+        @staticmethod
+        def bmm(arr1, arr2):
+            """batch matrix multiply two arrays"""
+            return cupy.einsum("ijk,ikl->ijl", arr1, arr2)
+
+        @staticmethod
+        def is_array(arr):
+            """check if an object is an array"""
+            return isinstance(arr, (numpy.ndarray, cupy.ndarray))
+
+        # constructors
+        def asarray(self, arr, dtype=None):
+            """transfer an array-like sequence to the GPU"""
+            arr = cupy.asarray(arr)
+            if arr.dtype in numpy_float_dtypes:
+                arr = cupy.asarray(arr, dtype=self.float)
+            return arr
+
+        def array(self, arr, dtype=None):
+            """create an array on the GPU from an array-like sequence"""
+            if dtype is None and getattr(arr, "dtype", None) not in (
+                numpy.complex64,
+                numpy.complex128,
+            ):
+                dtype = self.float
+            return cupy.array(arr, dtype=dtype)
+
+        def ones(self, shape, dtype=None):
+            """create an array filled with ones on the GPU"""
+            return cupy.ones(shape, dtype=dtype if dtype is not None else self.float)
+
+        def zeros(self, shape, dtype=None):
+            """create an array filled with zeros on the GPU"""
+            return cupy.zeros(shape, dtype=dtype if dtype is not None else self.float)
+
+        zeros_like = staticmethod(cupy.zeros_like)
+        """ create an array filled with zeros """
+
+        def linspace(self, start, stop, num=50, endpoint=True):
+            """create a linearly spaced array between two points"""
+            return cupy.linspace(start, stop, num, endpoint=endpoint, dtype=self.float)
+
+        def arange(self, *args, **kwargs):
+            """create a range of values"""
+            return cupy.arange(*args, **kwargs)
+
+        pad = staticmethod(cupy.pad)
+
+        fftfreq = staticmethod(cupy.fft.fftfreq)
+
+        fft = staticmethod(cupy.fft.fft)
+
+        divide = staticmethod(cupy.divide)
+
+        # ^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+        # The same warning applies here.
+        # <3 <3 <3 <3
+
+        def numpy(self, arr):
+            """copy the array back to the host as a numpy array"""
+            if isinstance(arr, cupy.ndarray):
+                return cupy.asnumpy(arr)
+            return numpy.asarray(arr)
+
+
 ## Default Backend
 # this backend object will be used for all array/tensor operations.
 # the backend is changed by changing the class of the backend
@@ -385,11 +531,20 @@ def set_backend(name: str):
             - ``torch.cuda.float16``
             - ``torch.cuda.float32``
             - ``torch.cuda.float64``
+            - ``cupy`` (defaults to float64 arrays on the GPU)
+            - ``cupy.float32``
+            - ``cupy.float64``
 
     """
     # perform checks
     if name.startswith("torch") and not TORCH_AVAILABLE:
         raise RuntimeError("Torch backend is not available. Is PyTorch installed?")
+    if name.startswith("cupy") and not CUPY_AVAILABLE:
+        raise RuntimeError(
+            "Cupy backend is not available.\n"
+            "Do you have a GPU on your computer?\n"
+            "Is CuPy installed?"
+        )
     if name.startswith("torch.cuda") and not TORCH_CUDA_AVAILABLE:
         raise RuntimeError(
             "Torch cuda backend is not available.\n"
@@ -433,7 +588,10 @@ def set_backend(name: str):
             raise ValueError(
                 "Unknown device '{device}'. Available devices: 'cpu', 'cuda'"
             )
+    elif name == "cupy":
+        backend.__class__ = CupyBackend
+        backend.float = getattr(numpy, dtype)
     else:
         raise ValueError(
-            "Unknown backend '{name}'. Available backends: 'numpy', 'torch'"
+            "Unknown backend '{name}'. Available backends: 'numpy', 'torch', 'cupy'"
         )
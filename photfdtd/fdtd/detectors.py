@@ -35,6 +35,12 @@ class LineDetector:
         self.E = []
         self.H = []
         self.name = name
+        # ring buffers, allocated in __init_h5file__: one batch of samples
+        # is collected with cheap indexed assignments and written to h5 in
+        # a single slab instead of appending to a Python list every step
+        self._batch = 1000
+        self._E_buf = None
+        self._H_buf = None
 
     def _register_grid(
             self, grid: Grid, x: ListOrSlice, y: ListOrSlice, z: ListOrSlice
@@ -81,6 +87,14 @@ class LineDetector:
             f.create_dataset(
                 "H", shape=(self.grid.total_time, l, 3), dtype="float32"
             )
+        self._prealloc(l)
+
+    def _prealloc(self, l):
+        """preallocate one batch worth of sample storage"""
+        dtype = getattr(self.grid, "dtype", np.float64)
+        self._E_buf = np.empty((self._batch, l, 3), dtype=dtype)
+        self._H_buf = np.empty((self._batch, l, 3), dtype=dtype)
+
     def _handle_slices(
             self, x: ListOrSlice, y: ListOrSlice, z: ListOrSlice
     ) -> Tuple[List, List, List]:
@@ -135,24 +149,29 @@ class LineDetector:
     def detect_E(self):
         """ detect the electric field at a certain location in the grid """
         # TODO: there is a performance bottleneck here (indexing with lists)
-        E = self.grid.E[self.x, self.y, self.z]
-        self.E.append(E)
+        if self._E_buf is None:
+            # stand-alone stepping without __init_h5file__: keep the old
+            # list accumulation
+            self.E.append(self.grid.E[self.x, self.y, self.z])
+            return
+        self._E_buf[self.grid.time_steps_passed % self._batch] = self.grid.E[
+            self.x, self.y, self.z
+        ]
 
         # Newly added
         if (self.grid.time_steps_passed != 0 and (
-                self.grid.time_steps_passed + 1) % 1000 == 0) or (self.grid.time_steps_passed + 1) == self.grid.total_time:
+                self.grid.time_steps_passed + 1) % self._batch == 0) or (self.grid.time_steps_passed + 1) == self.grid.total_time:
             self.flag_per_thousand_dt += 1
 
             # 计算当前批次的起始和结束索引
-            start_idx = (self.flag_per_thousand_dt - 1) * 1000
-            end_idx = min(self.grid.time_steps_passed, self.flag_per_thousand_dt * 1000)
+            start_idx = (self.flag_per_thousand_dt - 1) * self._batch
+            end_idx = min(self.grid.time_steps_passed, self.flag_per_thousand_dt * self._batch)
 
             with h5py.File(self.grid.folder + f"//{self.name}_E.h5", "a") as f:
                 dset = f["E"]
                 # 存储数据，确保不会超出 E 的实际大小
-                dset[start_idx:end_idx] = self.real_E()[:end_idx - start_idx]
+                dset[start_idx:end_idx] = simE_to_worldE(self._E_buf[:end_idx - start_idx])
             print(f"Detector {self.name} saved E data from {start_idx} to {end_idx}")
-            self.E = []
 
     # def detect_E_new(self):
     #     """ detect and save as h5py file at the same time, not saving in RAM """
@@ -165,23 +184,26 @@ class LineDetector:
     def detect_H(self):
         """ detect the magnetic field at a certain location in the grid """
         # TODO: there is a performance bottleneck here (indexing with lists)
-        H = self.grid.H[self.x, self.y, self.z]
-        self.H.append(H)
+        if self._H_buf is None:
+            self.H.append(self.grid.H[self.x, self.y, self.z])
+            return
+        self._H_buf[self.grid.time_steps_passed % self._batch] = self.grid.H[
+            self.x, self.y, self.z
+        ]
 
         # Newly added
         if (self.grid.time_steps_passed != 0 and (
-                self.grid.time_steps_passed + 1) % 1000 == 0) or (self.grid.time_steps_passed + 1) == self.grid.total_time:
+                self.grid.time_steps_passed + 1) % self._batch == 0) or (self.grid.time_steps_passed + 1) == self.grid.total_time:
 
             # 计算当前批次的起始和结束索引
-            start_idx = (self.flag_per_thousand_dt - 1) * 1000
-            end_idx = min(self.grid.time_steps_passed, self.flag_per_thousand_dt * 1000)
+            start_idx = (self.flag_per_thousand_dt - 1) * self._batch
+            end_idx = min(self.grid.time_steps_passed, self.flag_per_thousand_dt * self._batch)
 
             with h5py.File(self.grid.folder + f"//{self.name}_H.h5", "a") as f:
                 dset = f["H"]
                 # 存储数据，确保不会超出 H 的实际大小
-                dset[start_idx:end_idx] = self.real_H()[:end_idx - start_idx]
+                dset[start_idx:end_idx] = simH_to_worldH(self._H_buf[:end_idx - start_idx])
             print(f"Detector {self.name} saved H data from {start_idx} to {end_idx}")
-            self.H = []
 
     # def detect_H_new(self):
     #     """ detect and save as h5py file at the same time, not saving in RAM """
@@ -263,6 +285,10 @@ class BlockDetector:
         self.H = []
         self.axis = axis
         self.name = name
+        # ring buffers, see LineDetector
+        self._batch = 1000
+        self._E_buf = None
+        self._H_buf = None
 
     def _register_grid(
             self, grid: Grid, x: ListOrSlice, y: ListOrSlice, z: ListOrSlice
@@ -291,6 +317,9 @@ class BlockDetector:
                 )
 
         self.x, self.y, self.z = self._handle_slices(x, y, z)
+        # open-mesh index: one fancy-indexing call samples the whole block
+        # instead of a triple Python loop over the cells
+        self._ix = np.ix_(self.x, self.y, self.z)
 
     def __init_h5file__(self):
         self.flag_per_thousand_dt = 0
@@ -302,6 +331,15 @@ class BlockDetector:
             f.create_dataset(
                 "H", shape=(self.grid.total_time, len(self.x), len(self.y), len(self.z), 3), dtype="float32"
             )
+        self._prealloc()
+
+    def _prealloc(self):
+        """preallocate one batch worth of sample storage"""
+        dtype = getattr(self.grid, "dtype", np.float64)
+        shape = (self._batch, len(self.x), len(self.y), len(self.z), 3)
+        self._E_buf = np.empty(shape, dtype=dtype)
+        self._H_buf = np.empty(shape, dtype=dtype)
+
     def _handle_slices(
             self, x: ListOrSlice, y: ListOrSlice, z: ListOrSlice
     ) -> Tuple[List, List, List]:
@@ -354,61 +392,49 @@ class BlockDetector:
 
     def detect_E(self):
         """ detect the electric field at a certain location in the grid """
-        # TODO: there is a performance bottleneck here (indexing with lists)
-        E = []
-        for i, row in enumerate(self.x):
-            E.append([])
-            for j, col in enumerate(self.y):
-                E[i].append([])
-                for pillar in self.z:
-                    E[i][j].append(self.grid.E[row, col, [pillar]][0])
-        # E = self.grid.E[self.x, self.y, self.z]
-        self.E.append(E)
+        if self._E_buf is None:
+            # stand-alone stepping without __init_h5file__: keep the old
+            # list accumulation
+            self.E.append(self.grid.E[self._ix])
+            return
+        self._E_buf[self.grid.time_steps_passed % self._batch] = self.grid.E[self._ix]
 
         # Newly added
         if (self.grid.time_steps_passed != 0 and (
-                self.grid.time_steps_passed + 1) % 1000 == 0) or (self.grid.time_steps_passed + 1) == self.grid.total_time:
+                self.grid.time_steps_passed + 1) % self._batch == 0) or (self.grid.time_steps_passed + 1) == self.grid.total_time:
             self.flag_per_thousand_dt += 1
 
             # 计算当前批次的起始和结束索引
-            start_idx = (self.flag_per_thousand_dt - 1) * 1000
-            end_idx = min(self.grid.time_steps_passed, self.flag_per_thousand_dt * 1000)
+            start_idx = (self.flag_per_thousand_dt - 1) * self._batch
+            end_idx = min(self.grid.time_steps_passed, self.flag_per_thousand_dt * self._batch)
 
             with h5py.File(self.grid.folder + f"//{self.name}_E.h5", "a") as f:
                 dset = f["E"]
                 # 存储数据，确保不会超出 E 的实际大小
-                dset[start_idx:end_idx] = self.real_E()[:end_idx - start_idx]
+                dset[start_idx:end_idx] = simE_to_worldE(self._E_buf[:end_idx - start_idx])
             print(f"Detector {self.name} saved E data from {start_idx} to {end_idx}")
-            self.E = []
 
     def detect_H(self):
         """ detect the magnetic field at a certain location in the grid """
-        # TODO: there is a performance bottleneck here (indexing with lists)
-        H = []
-        for i, row in enumerate(self.x):
-            H.append([])
-            for j, col in enumerate(self.y):
-                H[i].append([])
-                for pillar in self.z:
-                    H[i][j].append(self.grid.H[row, col, [pillar]][0])
-        # H = self.grid.H[self.x, self.y, self.z]
-        self.H.append(H)
+        if self._H_buf is None:
+            self.H.append(self.grid.H[self._ix])
+            return
+        self._H_buf[self.grid.time_steps_passed % self._batch] = self.grid.H[self._ix]
 
         # Newly added
         if (self.grid.time_steps_passed != 0 and (
-                self.grid.time_steps_passed + 1) % 1000 == 0) or (self.grid.time_steps_passed + 1) == self.grid.total_time:
+                self.grid.time_steps_passed + 1) % self._batch == 0) or (self.grid.time_steps_passed + 1) == self.grid.total_time:
 
             # 计算当前批次的起始和结束索引
-            start_idx = (self.flag_per_thousand_dt - 1) * 1000
-            end_idx = min(self.grid.time_steps_passed, self.flag_per_thousand_dt * 1000)
+            start_idx = (self.flag_per_thousand_dt - 1) * self._batch
+            end_idx = min(self.grid.time_steps_passed, self.flag_per_thousand_dt * self._batch)
 
             with h5py.File(self.grid.folder + f"//{self.name}_H.h5", "a") as f:
                 dset = f["H"]
                 # 存储数据，确保不会超出 H 的实际大小
-                dset[start_idx:end_idx] = self.real_H()[:end_idx - start_idx]
+                dset[start_idx:end_idx] = simH_to_worldH(self._H_buf[:end_idx - start_idx])
             print(f"Detector {self.name} saved H data from {start_idx} to {end_idx}")
             print(f"{self.grid.time_steps_passed} time steps passed")
-            self.H = []
 
     def __repr__(self):
         return f"{self.__class__.__name__}(name={repr(self.name)})"
@@ -10,9 +10,11 @@ together and where the biggest part of the calculations are done.
 # standard library
 import os
 from os import path, makedirs, chdir, remove
-from subprocess import check_call, CalledProcessError
+from subprocess import check_call, CalledProcessError, Popen, PIPE, DEVNULL
 from glob import glob
 from datetime import datetime
+from threading import BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 # 3rd party
@@ -26,6 +28,16 @@ from .typing_ import Tuple, Number, Tensorlike
 from .backend import backend as bd
 from . import constants as const
 from .conversions import *
+from ._kernels import (
+    update_E_kernel,
+    update_H_kernel,
+    update_E_kernel_uniform,
+    update_H_kernel_uniform,
+    run_steps_kernel,
+    run_steps_kernel_uniform,
+    curl_E_kernel,
+    curl_H_kernel,
+)
 
 # plot
 import matplotlib
@@ -60,6 +72,7 @@ class Grid:
             permeability: float = 1.0,
             courant_number: float = None,
             folder: str = None,
+            precision: str = "single",
     ):
         """
         Args:
@@ -71,7 +84,23 @@ class Grid:
                 Defaults to the inverse of the square root of the number of
                 dimensions > 1 (optimal value). The timestep of the simulation
                 will be derived from this number using the CFL-condition.
+            precision: "single" (default) or "double". Single precision
+                halves the memory traffic of the memory-bound field updates
+                and doubles the SIMD width; since the update is one fused
+                multiply-add per step the accumulated rounding error stays
+                well-behaved for typical engineering runs. Pass "double" for
+                the old float64 behaviour.
         """
+        # working precision of the field and material arrays
+        if precision == "single":
+            self.dtype = np.float32
+        elif precision == "double":
+            self.dtype = np.float64
+        else:
+            raise ValueError(
+                f"invalid precision {precision}; choose 'single' or 'double'"
+            )
+
         # save the grid spacing
         # Currently self.grid_spacing
         self.background_index = permittivity ** 0.5
@@ -88,12 +117,35 @@ class Grid:
             self.grid_spacing_z = self.grid_spacing
         else:
             self.grid_spacing_z = grid_spacing_z
+        # reciprocal spacings, folded once so the curls multiply instead of
+        # dividing per element (FP division serializes, multiply pipelines)
+        self._inv_dx = 1.0 / self.grid_spacing_x
+        self._inv_dy = 1.0 / self.grid_spacing_y
+        self._inv_dz = 1.0 / self.grid_spacing_z
+        # per-axis spacing lookup for the distance-to-index helpers
+        self._gs = {
+            "x": self.grid_spacing_x,
+            "y": self.grid_spacing_y,
+            "z": self.grid_spacing_z,
+        }
         # save grid shape as integers
         self.Nx, self.Ny, self.Nz = self._handle_tuple(shape)
 
         # dimension of the simulation:
         self.D = int(self.Nx > 1) + int(self.Ny > 1) + int(self.Nz > 1)
 
+        # numpy curl implementation: on 2D (or 1D) grids the difference
+        # terms along a size-1 axis are identically zero, so a variant that
+        # skips those sweeps entirely is bound here once instead of testing
+        # the shape on every call. The fused kernels need no dispatch: their
+        # boundary guards already skip the degenerate terms.
+        if self.D < 3:
+            self._curl_E_impl = self._curl_E_numpy_2d
+            self._curl_H_impl = self._curl_H_numpy_2d
+        else:
+            self._curl_E_impl = self._curl_E_numpy
+            self._curl_H_impl = self._curl_H_numpy
+
         # courant number of the simulation (optimal value)
         max_courant_number = float(self.D) ** (-0.5)
         if courant_number is None:
@@ -115,22 +167,37 @@ class Grid:
             self.Nz > 1) / grid_spacing_z ** 2))
         # self.time_step = self.courant_number * self.grid_spacing / const.c
         # save electric and magnetic field
-        self.E = bd.zeros((self.Nx, self.Ny, self.Nz, 3))
-        self.H = bd.zeros((self.Nx, self.Ny, self.Nz, 3))
+        # stored SoA (component axis first) so that every component is one
+        # contiguous (Nx, Ny, Nz) block: the stencil kernels then read with
+        # unit stride on the fast axis instead of stride-3 interleaved
+        # components. The ``E``/``H`` properties below expose the classic
+        # (Nx, Ny, Nz, 3) layout as a writable view for sources, boundaries,
+        # detectors and visualization.
+        self._E = self._to_dtype(bd.zeros((3, self.Nx, self.Ny, self.Nz)))
+        self._H = self._to_dtype(bd.zeros((3, self.Nx, self.Ny, self.Nz)))
+
+        # scratch buffer for the curl, reused every timestep by the pure
+        # NumPy/torch update path (the fused kernels need no buffer at all):
+        # reallocating and zeroing a full field-sized array per step churns
+        # the heap for nothing.
+        self._curl = self._to_dtype(bd.zeros((self.Nx, self.Ny, self.Nz, 3)))
+        # lazily allocated scratch plane-set for the subtract-accumulate
+        # terms of the numpy curl fallback
+        self._curl_tmp = None
 
         # save the inverse of the relative permittiviy and the relative permeability
         # these tensors can be anisotropic!
 
         if bd.is_array(permittivity) and len(permittivity.shape) == 3:
             permittivity = permittivity[:, :, :, None]
-        self.inverse_permittivity = bd.ones((self.Nx, self.Ny, self.Nz, 3)) / bd.array(
-            permittivity, dtype=bd.float
+        self.inverse_permittivity = self._to_dtype(
+            bd.ones((self.Nx, self.Ny, self.Nz, 3)) / bd.array(permittivity, dtype=bd.float)
         )
 
         if bd.is_array(permeability) and len(permeability.shape) == 3:
             permeability = permeability[:, :, :, None]
-        self.inverse_permeability = bd.ones((self.Nx, self.Ny, self.Nz, 3)) / bd.array(
-            permeability, dtype=bd.float
+        self.inverse_permeability = self._to_dtype(
+            bd.ones((self.Nx, self.Ny, self.Nz, 3)) / bd.array(permeability, dtype=bd.float)
         )
 
         # Priority matrix of the grid, default to be a all-zero matrix, indicates the background of the sim region.
@@ -151,121 +218,387 @@ class Grid:
         # dictionary containing the objects in the grid
         self.objects = []
 
+        # cached tuples of the registered components: the per-step loops in
+        # update_E/update_H iterate these instead of re-reading the lists
+        # through attribute lookups every step
+        self._refresh_component_tuples()
+
         # folder path to store the simulation
         self.folder = folder
 
+        # fold c*dt into the material arrays once instead of per step
+        self._update_material_coefs()
+
+        # animation output: by default rendered frames are piped straight to
+        # ffmpeg as raw RGBA (one video file, no per-frame PNG encode). Set
+        # save_pngs=True to get the old one-PNG-per-frame behaviour back.
+        self.save_pngs = False
+        self.video_path = None
+        self._ffmpeg = None
+        # worker pool for PNG frame encoding, created on first use: the
+        # encode + disk write overlaps with the next timesteps while the
+        # semaphore bounds the number of in-flight frame buffers
+        self._io_pool = None
+        self._io_sem = None
+
+    def _refresh_component_tuples(self):
+        """cache the component lists as tuples for the per-step loops"""
+        self._boundaries_tuple = tuple(self.boundaries)
+        self._sources_tuple = tuple(self.sources)
+        self._detectors_tuple = tuple(self.detectors)
+
+    def _to_dtype(self, arr: Tensorlike) -> Tensorlike:
+        """cast a numpy array to the grid's working precision
+
+        no-op for equal dtypes and for backends that manage their own dtype
+        (torch/cupy arrays are left as the backend created them).
+        """
+        if isinstance(arr, np.ndarray):
+            return arr.astype(self.dtype, copy=False)
+        return arr
+
+    def _update_material_coefs(self):
+        """precompute the update coefficients ``c * dt * inverse_permittivity``
+        (and the permeability equivalent)
+
+        ``update_E`` used to evaluate this three-way product every step,
+        producing two full-size temporaries. The folded coefficients are
+        stored SoA (component axis first) like the fields, so the fused
+        kernels read them with unit stride and the update becomes a single
+        multiply-add per component.
+
+        Called at construction and again at the start of ``run``, since
+        objects rewrite ``inverse_permittivity`` when they register.
+        """
+        cdt = const.c * self.time_step
+        E_coef = bd.transpose(cdt * self.inverse_permittivity, (3, 0, 1, 2))
+        H_coef = bd.transpose(cdt * self.inverse_permeability, (3, 0, 1, 2))
+        if isinstance(E_coef, np.ndarray):
+            E_coef = np.ascontiguousarray(E_coef)
+            H_coef = np.ascontiguousarray(H_coef)
+        self._E_update_coef = E_coef
+        self._H_update_coef = H_coef
+        # with a uniform background and no objects the coefficient arrays
+        # hold one value repeated Nx*Ny*Nz*3 times; detecting that here lets
+        # the update keep the coefficient in a register instead of streaming
+        # three more field-sized arrays every step
+        if isinstance(E_coef, np.ndarray):
+            self._eps_uniform = bool(np.all(E_coef == E_coef.flat[0]))
+            self._mu_uniform = bool(np.all(H_coef == H_coef.flat[0]))
+            self._E_coef_scalar = float(E_coef.flat[0])
+            self._H_coef_scalar = float(H_coef.flat[0])
+        else:
+            self._eps_uniform = self._mu_uniform = False
+            self._E_coef_scalar = self._H_coef_scalar = 0.0
+        self._material_coefs_stale = False
+
     def _handle_distance(self, distance: Number, axis: "x") -> int:
         """transform a distance to an integer number of gridpoints"""
-        if axis == "x":
-            if not isinstance(distance, int):
-                return int(float(distance) / self.grid_spacing_x + 0.5)
+        if isinstance(distance, int):
             return distance
+        return int(float(distance) / self._gs[axis] + 0.5)
 
-        if axis == "y":
-            if not isinstance(distance, int):
-                return int(float(distance) / self.grid_spacing_y + 0.5)
-            return distance
+    def _handle_distance_array(self, distances: Tensorlike, axis: "x") -> Tensorlike:
+        """transform an array of distances to an array of gridpoint indices
 
-        if axis == "z":
-            if not isinstance(distance, int):
-                return int(float(distance) / self.grid_spacing_z + 0.5)
-            return distance
+        Vectorized counterpart of ``_handle_distance``; integer arrays pass
+        through unchanged.
+        """
+        distances = np.asarray(distances)
+        if np.issubdtype(distances.dtype, np.integer):
+            return distances.astype(np.intp, copy=False)
+        return np.rint(distances / self._gs[axis]).astype(np.intp)
+
+    # the dimensionless curl_E/curl_H of the original uniform-grid
+    # formulation were removed: the nonuniform versions below cover the
+    # uniform case with equal reciprocal spacings, so only one set of
+    # stencils (and one set of compiled kernels) has to be maintained.
 
-    def curl_E(self, E: Tensorlike) -> Tensorlike:
+    def curl_E_with_nonuniform_grid(self, E: Tensorlike, out: Tensorlike = None) -> Tensorlike:
         """Transforms an E-type field into an H-type field by performing a curl
         operation
 
         Args:
             E: Electric field to take the curl of (E-type field located on the
                edges of the grid cell [integer gridpoints])
+            out: optional preallocated buffer to write the curl into
 
         Returns:
             The curl of E (H-type field located on the faces of the grid [half-integer grid points])
-        du∇ × E[m, n, p]
+        ∇ × E[m, n, p]
         """
-        curl = bd.zeros(E.shape, dtype=E.dtype)
+        if curl_E_kernel is not None and isinstance(E, np.ndarray):
+            # the kernel writes every cell of the buffer, no zeroing needed
+            if out is None:
+                out = np.empty_like(E)
+            curl_E_kernel(
+                E,
+                out,
+                self._inv_dx,
+                self._inv_dy,
+                self._inv_dz,
+            )
+            return out
+
+        if isinstance(E, np.ndarray):
+            return self._curl_E_impl(E, out)
+
+        if out is None:
+            curl = bd.zeros(E.shape, dtype=E.dtype)
+        else:
+            curl = out
+            curl[...] = 0.0
 
-        curl[:, :-1, :, 0] += (E[:, 1:, :, 2] - E[:, :-1, :, 2])
-        curl[:, :, :-1, 0] -= (E[:, :, 1:, 1] - E[:, :, :-1, 1])
+        curl[:, :-1, :, 0] += (E[:, 1:, :, 2] - E[:, :-1, :, 2]) * self._inv_dy
+        curl[:, :, :-1, 0] -= (E[:, :, 1:, 1] - E[:, :, :-1, 1]) * self._inv_dz
 
-        curl[:, :, :-1, 1] += (E[:, :, 1:, 0] - E[:, :, :-1, 0])
-        curl[:-1, :, :, 1] -= (E[1:, :, :, 2] - E[:-1, :, :, 2])
+        curl[:, :, :-1, 1] += (E[:, :, 1:, 0] - E[:, :, :-1, 0]) * self._inv_dz
+        curl[:-1, :, :, 1] -= (E[1:, :, :, 2] - E[:-1, :, :, 2]) * self._inv_dx
 
-        curl[:-1, :, :, 2] += (E[1:, :, :, 1] - E[:-1, :, :, 1])
-        curl[:, :-1, :, 2] -= (E[:, 1:, :, 0] - E[:, :-1, :, 0])
+        curl[:-1, :, :, 2] += (E[1:, :, :, 1] - E[:-1, :, :, 1]) * self._inv_dx
+        curl[:, :-1, :, 2] -= (E[:, 1:, :, 0] - E[:, :-1, :, 0]) * self._inv_dy
 
         return curl
 
-    def curl_E_with_nonuniform_grid(self, E: Tensorlike) -> Tensorlike:
-        """Transforms an E-type field into an H-type field by performing a curl
+    def curl_H_with_nonuniform_grid(self, H: Tensorlike, out: Tensorlike = None) -> Tensorlike:
+        """Transforms an H-type field into an E-type field by performing a curl
         operation
 
         Args:
-            E: Electric field to take the curl of (E-type field located on the
-               edges of the grid cell [integer gridpoints])
+            H: Magnetic field to take the curl of (H-type field located on half-integer grid points)
+            out: optional preallocated buffer to write the curl into
 
         Returns:
-            The curl of E (H-type field located on the faces of the grid [half-integer grid points])
-        ∇ × E[m, n, p]
+            The curl of H (E-type field located on the edges of the grid [integer grid points])
+        ∇ × H[m, n, p]
         """
-        curl = bd.zeros(E.shape, dtype=E.dtype)
+        if curl_H_kernel is not None and isinstance(H, np.ndarray):
+            # the kernel writes every cell of the buffer, no zeroing needed
+            if out is None:
+                out = np.empty_like(H)
+            curl_H_kernel(
+                H,
+                out,
+                self._inv_dx,
+                self._inv_dy,
+                self._inv_dz,
+            )
+            return out
+
+        if isinstance(H, np.ndarray):
+            return self._curl_H_impl(H, out)
+
+        if out is None:
+            curl = bd.zeros(H.shape, dtype=H.dtype)
+        else:
+            curl = out
+            curl[...] = 0.0
 
-        curl[:, :-1, :, 0] += (E[:, 1:, :, 2] - E[:, :-1, :, 2]) / self.grid_spacing_y
-        curl[:, :, :-1, 0] -= (E[:, :, 1:, 1] - E[:, :, :-1, 1]) / self.grid_spacing_z
+        curl[:, 1:, :, 0] += (H[:, 1:, :, 2] - H[:, :-1, :, 2]) * self._inv_dy
+        curl[:, :, 1:, 0] -= (H[:, :, 1:, 1] - H[:, :, :-1, 1]) * self._inv_dz
 
-        curl[:, :, :-1, 1] += (E[:, :, 1:, 0] - E[:, :, :-1, 0]) / self.grid_spacing_z
-        curl[:-1, :, :, 1] -= (E[1:, :, :, 2] - E[:-1, :, :, 2]) / self.grid_spacing_x
+        curl[:, :, 1:, 1] += (H[:, :, 1:, 0] - H[:, :, :-1, 0]) * self._inv_dz
+        curl[1:, :, :, 1] -= (H[1:, :, :, 2] - H[:-1, :, :, 2]) * self._inv_dx
 
-        curl[:-1, :, :, 2] += (E[1:, :, :, 1] - E[:-1, :, :, 1]) / self.grid_spacing_x
-        curl[:, :-1, :, 2] -= (E[:, 1:, :, 0] - E[:, :-1, :, 0]) / self.grid_spacing_y
+        curl[1:, :, :, 2] += (H[1:, :, :, 1] - H[:-1, :, :, 1]) * self._inv_dx
+        curl[:, 1:, :, 2] -= (H[:, 1:, :, 0] - H[:, :-1, :, 0]) * self._inv_dy
 
         return curl
 
-    def curl_H(self, H: Tensorlike) -> Tensorlike:
-        """Transforms an H-type field into an E-type field by performing a curl
-        operation
+    def _get_curl_tmp(self, field: Tensorlike) -> Tensorlike:
+        """scratch array for the subtract-accumulate curl terms"""
+        tmp = self._curl_tmp
+        if tmp is None or tmp.shape != field.shape[:3] or tmp.dtype != field.dtype:
+            tmp = self._curl_tmp = np.empty(field.shape[:3], dtype=field.dtype)
+        return tmp
 
-        Args:
-            H: Magnetic field to take the curl of (H-type field located on half-integer grid points)
+    def _curl_E_numpy(self, E: Tensorlike, out: Tensorlike = None) -> Tensorlike:
+        """curl of an E-type field without temporaries (no-numba numpy path)
 
-        Returns:
-            The curl of H (E-type field located on the edges of the grid [integer grid points])
-        du∇ × H[m, n, p]
+        Uses ``np.subtract(..., out=...)`` so none of the six difference
+        terms materializes a full array; the second term of each component
+        is staged in a reusable scratch array before being subtracted in
+        place.
         """
-        curl = bd.zeros(H.shape, dtype=H.dtype)
+        if out is None:
+            out = np.empty_like(E)
+        curl = out
+        tmp = self._get_curl_tmp(E)
+        inv_dx = self._inv_dx
+        inv_dy = self._inv_dy
+        inv_dz = self._inv_dz
+
+        # x-component: dEz/dy - dEy/dz
+        np.subtract(E[:, 1:, :, 2], E[:, :-1, :, 2], out=curl[:, :-1, :, 0])
+        curl[:, :-1, :, 0] *= inv_dy
+        curl[:, -1, :, 0] = 0.0
+        t = tmp[:, :, :-1]
+        np.subtract(E[:, :, 1:, 1], E[:, :, :-1, 1], out=t)
+        t *= inv_dz
+        curl[:, :, :-1, 0] -= t
+
+        # y-component: dEx/dz - dEz/dx
+        np.subtract(E[:, :, 1:, 0], E[:, :, :-1, 0], out=curl[:, :, :-1, 1])
+        curl[:, :, :-1, 1] *= inv_dz
+        curl[:, :, -1, 1] = 0.0
+        t = tmp[:-1, :, :]
+        np.subtract(E[1:, :, :, 2], E[:-1, :, :, 2], out=t)
+        t *= inv_dx
+        curl[:-1, :, :, 1] -= t
+
+        # z-component: dEy/dx - dEx/dy
+        np.subtract(E[1:, :, :, 1], E[:-1, :, :, 1], out=curl[:-1, :, :, 2])
+        curl[:-1, :, :, 2] *= inv_dx
+        curl[-1, :, :, 2] = 0.0
+        t = tmp[:, :-1, :]
+        np.subtract(E[:, 1:, :, 0], E[:, :-1, :, 0], out=t)
+        t *= inv_dy
+        curl[:, :-1, :, 2] -= t
 
-        curl[:, 1:, :, 0] += (H[:, 1:, :, 2] - H[:, :-1, :, 2])
-        curl[:, :, 1:, 0] -= (H[:, :, 1:, 1] - H[:, :, :-1, 1])
+        return curl
 
-        curl[:, :, 1:, 1] += (H[:, :, 1:, 0] - H[:, :, :-1, 0])
-        curl[1:, :, :, 1] -= (H[1:, :, :, 2] - H[:-1, :, :, 2])
+    def _curl_H_numpy(self, H: Tensorlike, out: Tensorlike = None) -> Tensorlike:
+        """curl of an H-type field without temporaries (no-numba numpy path)
 
-        curl[1:, :, :, 2] += (H[1:, :, :, 1] - H[:-1, :, :, 1])
-        curl[:, 1:, :, 2] -= (H[:, 1:, :, 0] - H[:, :-1, :, 0])
+        Same scheme as ``_curl_E_numpy`` with the backward-difference
+        slicing of ``curl_H_with_nonuniform_grid``.
+        """
+        if out is None:
+            out = np.empty_like(H)
+        curl = out
+        tmp = self._get_curl_tmp(H)
+        inv_dx = self._inv_dx
+        inv_dy = self._inv_dy
+        inv_dz = self._inv_dz
+
+        # x-component: dHz/dy - dHy/dz
+        np.subtract(H[:, 1:, :, 2], H[:, :-1, :, 2], out=curl[:, 1:, :, 0])
+        curl[:, 1:, :, 0] *= inv_dy
+        curl[:, 0, :, 0] = 0.0
+        t = tmp[:, :, 1:]
+        np.subtract(H[:, :, 1:, 1], H[:, :, :-1, 1], out=t)
+        t *= inv_dz
+        curl[:, :, 1:, 0] -= t
+
+        # y-component: dHx/dz - dHz/dx
+        np.subtract(H[:, :, 1:, 0], H[:, :, :-1, 0], out=curl[:, :, 1:, 1])
+        curl[:, :, 1:, 1] *= inv_dz
+        curl[:, :, 0, 1] = 0.0
+        t = tmp[1:, :, :]
+        np.subtract(H[1:, :, :, 2], H[:-1, :, :, 2], out=t)
+        t *= inv_dx
+        curl[1:, :, :, 1] -= t
+
+        # z-component: dHy/dx - dHx/dy
+        np.subtract(H[1:, :, :, 1], H[:-1, :, :, 1], out=curl[1:, :, :, 2])
+        curl[1:, :, :, 2] *= inv_dx
+        curl[0, :, :, 2] = 0.0
+        t = tmp[:, 1:, :]
+        np.subtract(H[:, 1:, :, 0], H[:, :-1, :, 0], out=t)
+        t *= inv_dy
+        curl[:, 1:, :, 2] -= t
 
         return curl
 
-    def curl_H_with_nonuniform_grid(self, H: Tensorlike) -> Tensorlike:
-        """Transforms an H-type field into an E-type field by performing a curl
-        operation
-
-        Args:
-            H: Magnetic field to take the curl of (H-type field located on half-integer grid points)
+    def _curl_E_numpy_2d(self, E: Tensorlike, out: Tensorlike = None) -> Tensorlike:
+        """``_curl_E_numpy`` specialized for grids with a size-1 axis
 
-        Returns:
-            The curl of H (E-type field located on the edges of the grid [integer grid points])
-        ∇ × H[m, n, p]
+        Differences along a degenerate axis are identically zero, so each
+        term is guarded by the axis size: only the surviving sweeps touch
+        memory and components without any surviving first term are zeroed
+        wholesale before accumulation.
         """
-        curl = bd.zeros(H.shape, dtype=H.dtype)
-
-        curl[:, 1:, :, 0] += (H[:, 1:, :, 2] - H[:, :-1, :, 2]) / self.grid_spacing_y
-        curl[:, :, 1:, 0] -= (H[:, :, 1:, 1] - H[:, :, :-1, 1]) / self.grid_spacing_z
+        if out is None:
+            out = np.empty_like(E)
+        curl = out
+        tmp = self._get_curl_tmp(E)
+
+        # x-component: dEz/dy - dEy/dz
+        if self.Ny > 1:
+            np.subtract(E[:, 1:, :, 2], E[:, :-1, :, 2], out=curl[:, :-1, :, 0])
+            curl[:, :-1, :, 0] *= self._inv_dy
+            curl[:, -1, :, 0] = 0.0
+        else:
+            curl[:, :, :, 0] = 0.0
+        if self.Nz > 1:
+            t = tmp[:, :, :-1]
+            np.subtract(E[:, :, 1:, 1], E[:, :, :-1, 1], out=t)
+            t *= self._inv_dz
+            curl[:, :, :-1, 0] -= t
+
+        # y-component: dEx/dz - dEz/dx
+        if self.Nz > 1:
+            np.subtract(E[:, :, 1:, 0], E[:, :, :-1, 0], out=curl[:, :, :-1, 1])
+            curl[:, :, :-1, 1] *= self._inv_dz
+            curl[:, :, -1, 1] = 0.0
+        else:
+            curl[:, :, :, 1] = 0.0
+        if self.Nx > 1:
+            t = tmp[:-1, :, :]
+            np.subtract(E[1:, :, :, 2], E[:-1, :, :, 2], out=t)
+            t *= self._inv_dx
+            curl[:-1, :, :, 1] -= t
+
+        # z-component: dEy/dx - dEx/dy
+        if self.Nx > 1:
+            np.subtract(E[1:, :, :, 1], E[:-1, :, :, 1], out=curl[:-1, :, :, 2])
+            curl[:-1, :, :, 2] *= self._inv_dx
+            curl[-1, :, :, 2] = 0.0
+        else:
+            curl[:, :, :, 2] = 0.0
+        if self.Ny > 1:
+            t = tmp[:, :-1, :]
+            np.subtract(E[:, 1:, :, 0], E[:, :-1, :, 0], out=t)
+            t *= self._inv_dy
+            curl[:, :-1, :, 2] -= t
 
-        curl[:, :, 1:, 1] += (H[:, :, 1:, 0] - H[:, :, :-1, 0]) / self.grid_spacing_z
-        curl[1:, :, :, 1] -= (H[1:, :, :, 2] - H[:-1, :, :, 2]) / self.grid_spacing_x
+        return curl
 
-        curl[1:, :, :, 2] += (H[1:, :, :, 1] - H[:-1, :, :, 1]) / self.grid_spacing_x
-        curl[:, 1:, :, 2] -= (H[:, 1:, :, 0] - H[:, :-1, :, 0]) / self.grid_spacing_y
+    def _curl_H_numpy_2d(self, H: Tensorlike, out: Tensorlike = None) -> Tensorlike:
+        """``_curl_H_numpy`` specialized for grids with a size-1 axis"""
+        if out is None:
+            out = np.empty_like(H)
+        curl = out
+        tmp = self._get_curl_tmp(H)
+
+        # x-component: dHz/dy - dHy/dz
+        if self.Ny > 1:
+            np.subtract(H[:, 1:, :, 2], H[:, :-1, :, 2], out=curl[:, 1:, :, 0])
+            curl[:, 1:, :, 0] *= self._inv_dy
+            curl[:, 0, :, 0] = 0.0
+        else:
+            curl[:, :, :, 0] = 0.0
+        if self.Nz > 1:
+            t = tmp[:, :, 1:]
+            np.subtract(H[:, :, 1:, 1], H[:, :, :-1, 1], out=t)
+            t *= self._inv_dz
+            curl[:, :, 1:, 0] -= t
+
+        # y-component: dHx/dz - dHz/dx
+        if self.Nz > 1:
+            np.subtract(H[:, :, 1:, 0], H[:, :, :-1, 0], out=curl[:, :, 1:, 1])
+            curl[:, :, 1:, 1] *= self._inv_dz
+            curl[:, :, 0, 1] = 0.0
+        else:
+            curl[:, :, :, 1] = 0.0
+        if self.Nx > 1:
+            t = tmp[1:, :, :]
+            np.subtract(H[1:, :, :, 2], H[:-1, :, :, 2], out=t)
+            t *= self._inv_dx
+            curl[1:, :, :, 1] -= t
+
+        # z-component: dHy/dx - dHx/dy
+        if self.Nx > 1:
+            np.subtract(H[1:, :, :, 1], H[:-1, :, :, 1], out=curl[1:, :, :, 2])
+            curl[1:, :, :, 2] *= self._inv_dx
+            curl[0, :, :, 2] = 0.0
+        else:
+            curl[:, :, :, 2] = 0.0
+        if self.Ny > 1:
+            t = tmp[:, 1:, :]
+            np.subtract(H[:, 1:, :, 0], H[:, :-1, :, 0], out=t)
+            t *= self._inv_dy
+            curl[:, 1:, :, 2] -= t
 
         return curl
 
@@ -307,6 +640,8 @@ class Grid:
 
     def _handle_single_key(self, key, axis="x"):
         """transform a single index key to a slice or list"""
+        if isinstance(key, np.ndarray):
+            return list(self._handle_distance_array(key, axis))
         try:
             len(key)
             return [self._handle_distance(k, axis) for k in key]
@@ -317,6 +652,68 @@ class Grid:
                 return [self._handle_distance(key, axis)]
         return key
 
+    @property
+    def E(self) -> Tensorlike:
+        """the electric field in (Nx, Ny, Nz, 3) layout
+
+        this is a writable view on the SoA storage: assigning through it
+        (e.g. by sources or boundaries) updates the underlying arrays.
+        """
+        return bd.transpose(self._E, (1, 2, 3, 0))
+
+    @E.setter
+    def E(self, value: Tensorlike):
+        value = bd.transpose(value, (3, 0, 1, 2))
+        if isinstance(value, np.ndarray):
+            value = np.ascontiguousarray(value)
+        self._E = value
+
+    @property
+    def H(self) -> Tensorlike:
+        """the magnetic field in (Nx, Ny, Nz, 3) layout
+
+        this is a writable view on the SoA storage: assigning through it
+        (e.g. by sources or boundaries) updates the underlying arrays.
+        """
+        return bd.transpose(self._H, (1, 2, 3, 0))
+
+    @H.setter
+    def H(self, value: Tensorlike):
+        value = bd.transpose(value, (3, 0, 1, 2))
+        if isinstance(value, np.ndarray):
+            value = np.ascontiguousarray(value)
+        self._H = value
+
+    @property
+    def Ex(self) -> Tensorlike:
+        """the x-component of the electric field as a contiguous (Nx, Ny, Nz) array"""
+        return self._E[0]
+
+    @property
+    def Ey(self) -> Tensorlike:
+        """the y-component of the electric field as a contiguous (Nx, Ny, Nz) array"""
+        return self._E[1]
+
+    @property
+    def Ez(self) -> Tensorlike:
+        """the z-component of the electric field as a contiguous (Nx, Ny, Nz) array"""
+        return self._E[2]
+
+    @property
+    def Hx(self) -> Tensorlike:
+        """the x-component of the magnetic field as a contiguous (Nx, Ny, Nz) array"""
+        return self._H[0]
+
+    @property
+    def Hy(self) -> Tensorlike:
+        """the y-component of the magnetic field as a contiguous (Nx, Ny, Nz) array"""
+        return self._H[1]
+
+    @property
+    def Hz(self) -> Tensorlike:
+        """the z-component of the magnetic field as a contiguous (Nx, Ny, Nz) array"""
+        return self._H[2]
+
     @property
     def x(self) -> int:
         """get the number of grid cells in the x-direction"""
@@ -354,6 +751,58 @@ class Grid:
         if isinstance(total_time, float):
             total_time /= self.time_step
         self.total_time = int(total_time)
+        # objects may have rewritten the material arrays since construction
+        self._update_material_coefs()
+        self._refresh_component_tuples()
+
+        if (
+                run_steps_kernel is not None
+                and isinstance(self._E, np.ndarray)
+                and not self.boundaries
+                and not self.sources
+                and not self.detectors
+                and not self.animate
+        ):
+            # nothing needs Python between steps: stage the time loop in
+            # compiled chunks, returning only to update the progress bar
+            inv_dx = self._inv_dx
+            inv_dy = self._inv_dy
+            inv_dz = self._inv_dz
+            uniform = self._eps_uniform and self._mu_uniform
+            pbar = tqdm(total=self.total_time) if progress_bar else None
+            steps_done = 0
+            while steps_done < self.total_time:
+                chunk = min(interval, self.total_time - steps_done)
+                if uniform:
+                    run_steps_kernel_uniform(
+                        self._E,
+                        self._H,
+                        self._E_coef_scalar,
+                        self._H_coef_scalar,
+                        inv_dx,
+                        inv_dy,
+                        inv_dz,
+                        chunk,
+                    )
+                else:
+                    run_steps_kernel(
+                        self._E,
+                        self._H,
+                        self._E_update_coef,
+                        self._H_update_coef,
+                        inv_dx,
+                        inv_dy,
+                        inv_dz,
+                        chunk,
+                    )
+                steps_done += chunk
+                self.time_steps_passed += chunk
+                if pbar is not None:
+                    pbar.update(chunk)
+            if pbar is not None:
+                pbar.close()
+            return
+
         time = range(0, self.total_time, 1)
         if progress_bar:
             time = tqdm(time)
@@ -368,11 +817,24 @@ class Grid:
             det.__init_h5file__()
         for _ in time:
             self.step(interval=interval)
+        if self.animate:
+            self._close_ffmpeg()
+            self._close_io_pool()
 
     def step(self, interval=100):
         """do a single FDTD step by first updating the electric field and then
         updating the magnetic field
         """
+        if (
+                len(self._boundaries_tuple) != len(self.boundaries)
+                or len(self._sources_tuple) != len(self.sources)
+                or len(self._detectors_tuple) != len(self.detectors)
+        ):
+            # components were registered since the last refresh
+            self._refresh_component_tuples()
+        if self._material_coefs_stale:
+            # objects rewrote the material arrays since the last fold
+            self._update_material_coefs()
         self.update_E()
         self.update_H()
         if self.animate and self.time_steps_passed % interval == 0:
@@ -383,13 +845,22 @@ class Grid:
         # TODO: for 3d simulation
         """save frames for animation"""
 
-        if "self._Epol" not in locals():
+        # the string-in-locals() checks used before were always True, so the
+        # full-array abs+max reduction silently ran again for every frame
+        if not hasattr(self, "_Epol"):
             self._Epol = 'xyz'.index(self.sources[0].polarization)
-        if "self.max_abs" not in locals():
-            # self.max_abs = 1
-            self.max_abs = np.max(simE_to_worldE(np.abs(self.E[:, :, :, self._Epol])))
-
-        fig, ax = plt.subplots()
+        if not hasattr(self, "max_abs") or self.max_abs == 0.0:
+            # keep recomputing until the reduction is nonzero: the first
+            # frame is saved before the source has injected anything, and a
+            # cached all-zero scale would render every later frame flat
+            self.max_abs = float(bd.max(simE_to_worldE(bd.abs((self.Ex, self.Ey, self.Ez)[self._Epol]))))
+            if hasattr(self, "_anim_im"):
+                self._anim_im.set_clim(-self.max_abs, self.max_abs)
+
+        E_pol = (self.Ex, self.Ey, self.Ez)[self._Epol]
+        if bd.is_gpu:
+            # single device-to-host copy of the polarized component per saved frame
+            E_pol = bd.numpy(E_pol)
         if self.Nx == 1:
             axis = "x"
         elif self.Ny == 1:
@@ -400,37 +871,165 @@ class Grid:
             # 3d仿真，自动绘制grid中心面上的场分布。3D simulation, plot the field distribution on the center plane of the grid.
             axis_index = int(self.E.shape[letter_to_number(axis)] / 2)
         if axis == "x":
-            im = ax.imshow(simE_to_worldE(np.transpose(self.E[axis_index, :, :, self._Epol])), cmap="RdBu", interpolation="nearest", aspect="auto",
-                           origin="lower", vmin=-self.max_abs, vmax=self.max_abs)
-            ax.set_xlabel("y")
-            ax.set_ylabel("z")
+            plane = np.transpose(E_pol[axis_index, :, :])
+            xlabel, ylabel = "y", "z"
         elif axis == "y":
-            im = ax.imshow(simE_to_worldE(np.transpose(self.E[:, axis_index, :, self._Epol])), cmap="RdBu", interpolation="nearest", aspect="auto",
-                           origin="lower", vmin=-self.max_abs, vmax=self.max_abs)
-            ax.set_xlabel("x")
-            ax.set_ylabel("z")
+            plane = np.transpose(E_pol[:, axis_index, :])
+            xlabel, ylabel = "x", "z"
         elif axis == "z":
-            im = ax.imshow(simE_to_worldE(np.transpose(self.E[:, :, axis_index, self._Epol])), cmap="RdBu", interpolation="nearest", aspect="auto",
-                           origin="lower", vmin=-self.max_abs, vmax=self.max_abs)
-            ax.set_xlabel("x")
-            ax.set_ylabel("y")
+            plane = np.transpose(E_pol[:, :, axis_index])
+            xlabel, ylabel = "x", "y"
+
+        # the figure, image and colorbar are built once and reused: per-frame
+        # subplots()/colorbar() construction dominated the cost of saving a
+        # frame on small grids
+        if not hasattr(self, "_anim_fig"):
+            self._anim_fig, self._anim_ax = plt.subplots()
+            self._anim_im = self._anim_ax.imshow(
+                simE_to_worldE(plane), cmap="RdBu", interpolation="nearest", aspect="auto",
+                origin="lower", vmin=-self.max_abs, vmax=self.max_abs)
+            self._anim_ax.set_xlabel(xlabel)
+            self._anim_ax.set_ylabel(ylabel)
+            self._anim_cbar = self._anim_fig.colorbar(self._anim_im)
+            self._anim_cbar.set_label(f"E{number_to_letter(self._Epol)} V/m")
+        else:
+            self._anim_im.set_data(simE_to_worldE(plane))
+        self._anim_ax.set_title(f"{self.time_steps_passed} time steps")
+        if self.save_pngs:
+            self._write_png_frame(self._anim_fig)
+        else:
+            self._write_video_frame(self._anim_fig)
+
+    def _write_video_frame(self, fig):
+        """pipe one rendered frame to ffmpeg as raw RGBA
 
-        cbar = plt.colorbar(im)
-        cbar.set_label(f"E{number_to_letter(self._Epol)} V/m")
-        plt.title(f"{self.time_steps_passed} time steps")
-        plt.savefig(f"{self.folder_frames}/E_{self.time_steps_passed}.png")
-        plt.close(fig)  # 自动关闭图形
+        The PNG encode and the one-file-per-frame directory are skipped
+        entirely: the canvas buffer goes straight into the encoder's stdin
+        and comes out as ``{folder}/video.mp4``. Falls back to PNG frames
+        when ffmpeg is not available in the path.
+        """
+        fig.canvas.draw()
+        w, h = fig.canvas.get_width_height()
+        if self._ffmpeg is None:
+            self.video_path = path.join(self.folder, "video.mp4")
+            try:
+                self._ffmpeg = Popen(
+                    [
+                        "ffmpeg",
+                        "-y",
+                        "-f",
+                        "rawvideo",
+                        "-pix_fmt",
+                        "rgba",
+                        "-s",
+                        f"{w}x{h}",
+                        "-r",
+                        "8",
+                        "-i",
+                        "-",
+                        "-pix_fmt",
+                        "yuv420p",
+                        self.video_path,
+                    ],
+                    stdin=PIPE,
+                    stdout=DEVNULL,
+                    stderr=DEVNULL,
+                )
+            except FileNotFoundError:
+                print("ffmpeg not found in path, falling back to png frames")
+                self.save_pngs = True
+                self.video_path = None
+                fig.savefig(f"{self.folder_frames}/E_{self.time_steps_passed}.png")
+                return
+        self._ffmpeg.stdin.write(fig.canvas.buffer_rgba().tobytes())
+
+    def _write_png_frame(self, fig):
+        """hand a rendered frame to a worker thread for PNG encoding
+
+        Matplotlib is not thread-safe, so the figure is rasterized here on
+        the calling thread; only the PNG encode and the disk write happen on
+        the worker, overlapping with the next timesteps. The semaphore keeps
+        at most a few frame buffers in flight.
+        """
+        fig.canvas.draw()
+        buf = np.asarray(fig.canvas.buffer_rgba()).copy()
+        filename = f"{self.folder_frames}/E_{self.time_steps_passed}.png"
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=2)
+            self._io_sem = BoundedSemaphore(4)
+        self._io_sem.acquire()
+        self._io_pool.submit(self._encode_png, buf, filename)
+
+    def _encode_png(self, buf, filename):
+        """worker-side PNG encode of one raw RGBA frame"""
+        try:
+            matplotlib.image.imsave(filename, buf)
+        finally:
+            self._io_sem.release()
+
+    def _close_io_pool(self):
+        """wait for pending PNG writes and release the worker pool"""
+        if getattr(self, "_io_pool", None) is not None:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
+            self._io_sem = None
+
+    def _close_ffmpeg(self):
+        """finalize the animation video by closing the encoder's stdin"""
+        if getattr(self, "_ffmpeg", None) is not None:
+            self._ffmpeg.stdin.close()
+            self._ffmpeg.wait()
+            self._ffmpeg = None
+
+    def __del__(self):
+        try:
+            self._close_ffmpeg()
+        except Exception:
+            pass
+        try:
+            self._close_io_pool()
+        except Exception:
+            pass
+        try:
+            if hasattr(self, "_anim_fig"):
+                plt.close(self._anim_fig)
+        except Exception:
+            pass
 
     def update_E(self):
         """update the electric field by using the curl of the magnetic field"""
 
         # update boundaries: step 1
-        for boundary in self.boundaries:
+        for boundary in self._boundaries_tuple:
             boundary.update_phi_E(dx=self.grid_spacing_x, dy=self.grid_spacing_y, dz=self.grid_spacing_z)
 
-        curl = self.curl_H_with_nonuniform_grid(self.H)
         # Before: self.E += self.courant_number * self.inverse_permittivity * curl
-        self.E += const.c * self.time_step * self.inverse_permittivity * curl
+        if update_E_kernel is not None and isinstance(self._E, np.ndarray):
+            # fused curl + update: single pass over the fields
+            if self._eps_uniform:
+                update_E_kernel_uniform(
+                    self._E,
+                    self._H,
+                    self._E_coef_scalar,
+                    self._inv_dx,
+                    self._inv_dy,
+                    self._inv_dz,
+                )
+            else:
+                update_E_kernel(
+                    self._E,
+                    self._H,
+                    self._E_update_coef,
+                    self._inv_dx,
+                    self._inv_dy,
+                    self._inv_dz,
+                )
+        else:
+            curl = self.curl_H_with_nonuniform_grid(self.H, out=self._curl)
+            if self._eps_uniform:
+                self.E += self._E_coef_scalar * curl
+            else:
+                self.E += bd.transpose(self._E_update_coef, (1, 2, 3, 0)) * curl
 
         # update objects
         # for obj in self.objects:
@@ -439,77 +1038,125 @@ class Grid:
         #     obj.update_E(curl)
 
         # update boundaries: step 2
-        for boundary in self.boundaries:
+        for boundary in self._boundaries_tuple:
             boundary.update_E()
 
         # add sources to grid:
-        for src in self.sources:
+        for src in self._sources_tuple:
             src.update_E()
 
         # detect electric field
-        for det in self.detectors:
+        for det in self._detectors_tuple:
             det.detect_E()
 
     def update_H(self):
         """update the magnetic field by using the curl of the electric field"""
 
         # update boundaries: step 1
-        for boundary in self.boundaries:
+        for boundary in self._boundaries_tuple:
             boundary.update_phi_H(dx=self.grid_spacing_x, dy=self.grid_spacing_y, dz=self.grid_spacing_z)
 
-        curl = self.curl_E_with_nonuniform_grid(self.E)
         # Before: self.H -= self.courant_number * self.inverse_permeability * curl
         # self.H -= self.time_step * self.inverse_permeability * curl / sqrt(const.mu0)
-        self.H -= const.c * self.time_step * self.inverse_permeability * curl
+        if update_H_kernel is not None and isinstance(self._H, np.ndarray):
+            # fused curl + update: single pass over the fields
+            if self._mu_uniform:
+                update_H_kernel_uniform(
+                    self._E,
+                    self._H,
+                    self._H_coef_scalar,
+                    self._inv_dx,
+                    self._inv_dy,
+                    self._inv_dz,
+                )
+            else:
+                update_H_kernel(
+                    self._E,
+                    self._H,
+                    self._H_update_coef,
+                    self._inv_dx,
+                    self._inv_dy,
+                    self._inv_dz,
+                )
+        else:
+            curl = self.curl_E_with_nonuniform_grid(self.E, out=self._curl)
+            if self._mu_uniform:
+                self.H -= self._H_coef_scalar * curl
+            else:
+                self.H -= bd.transpose(self._H_update_coef, (1, 2, 3, 0)) * curl
 
         # # update objects
         # for obj in self.objects:
         #     obj.update_H(curl)
 
         # update boundaries: step 2
-        for boundary in self.boundaries:
+        for boundary in self._boundaries_tuple:
             boundary.update_H()
 
         # add sources to grid:
-        for src in self.sources:
+        for src in self._sources_tuple:
             src.update_H()
 
         # detect electric field
-        for det in self.detectors:
+        for det in self._detectors_tuple:
             det.detect_H()
 
     def reset(self):
         """reset the grid by setting all fields to zero"""
-        self.H *= 0.0
-        self.E *= 0.0
-        self.time_steps_passed *= 0
+        if isinstance(self._E, np.ndarray):
+            # plain memset: no read pass like ``*= 0.0``, and it also clears
+            # NaN/inf values that a multiply would propagate
+            self._E.fill(0.0)
+            self._H.fill(0.0)
+        else:
+            self.E *= 0.0
+            self.H *= 0.0
+        self.time_steps_passed = 0
+
+    # Note: the usual registration path is index-assignment
+    # (``grid[x, y, z] = component``), which records the component's location
+    # and appends it to the lists below. These helpers only (re)name a
+    # component that was already registered; they refuse unregistered
+    # components (which would crash at the first step without a grid) and
+    # never append one twice (a doubled source would inject twice per step).
+    def _add_component(self, name, component, components):
+        if getattr(component, "grid", None) is not self:
+            raise ValueError(
+                f"cannot add unregistered component {component!r}: register "
+                f"it with grid[x, y, z] = component first"
+            )
+        component.name = name
+        if component not in components:
+            components.append(component)
 
     def add_source(self, name, source):
         """add a source to the grid"""
-        source._register_grid(self)
-        self.sources[name] = source
+        self._add_component(name, source, self.sources)
+        self._refresh_component_tuples()
         # if not hasattr(self, "source_profile"):
         #     self.source_profile = {}
         # self.source_profile += {name: bd.empty((3))}
 
     def add_boundary(self, name, boundary):
         """add a boundary to the grid"""
-        boundary._register_grid(self)
-        self.boundaries[name] = boundary
+        self._add_component(name, boundary, self.boundaries)
+        self._refresh_component_tuples()
 
     def add_detector(self, name, detector):
         """add a detector to the grid"""
-        detector._register_grid(self)
-        self.detectors[name] = detector
+        self._add_component(name, detector, self.detectors)
+        self._refresh_component_tuples()
 
     def add_object(self, name, obj):
         """add an object to the grid"""
-        obj._register_grid(self)
-        self.objects[name] = obj
+        self._add_component(name, obj, self.objects)
 
     def promote_dtypes_to_complex(self):
-        self.E = self.E.astype(bd.complex)
-        self.H = self.H.astype(bd.complex)
+        # match the complex width to the working precision of the fields
+        complex_dtype = np.complex64 if self.dtype == np.float32 else bd.complex
+        self.E = self.E.astype(complex_dtype)
+        self.H = self.H.astype(complex_dtype)
+        self._curl = self._curl.astype(complex_dtype)
         [boundary.promote_dtypes_to_complex() for boundary in self.boundaries]
 
     def __setitem__(self, key, attr):
@@ -611,6 +1258,10 @@ class Grid:
             this function requires ``ffmpeg`` to be available in your path.
         """
         print(f"self.folder is {self.folder}")
+        if self.video_path is not None:
+            # the frames were already piped straight to ffmpeg during the run
+            self._close_ffmpeg()
+            return self.video_path
         frame_folder = path.join(self.folder, "frames")
         if frame_folder is None:
             raise Exception(
@@ -111,6 +111,10 @@ class Object:
         # Update the "grid.priority" matrix.
         self.grid.priority[self.x, self.y, self.z] = self.priority > self.grid.priority[self.x, self.y, self.z]
 
+        # the grid's folded update coefficients no longer match the material
+        # arrays; step()/run() refold them before the next update
+        self.grid._material_coefs_stale = True
+
     def _handle_slice(self, s: ListOrSlice, max_index: int = None) -> slice:
         if isinstance(s, list):
             if len(s) == 1:
@@ -916,6 +916,10 @@ class Grid:
         """
         import subprocess
         import re
+        # 若帧已在仿真时直接通过管道送入ffmpeg，则视频已经生成，无需再拼接图片
+        # If frames were piped straight to ffmpeg during the run, the video already exists.
+        if getattr(self._grid, "video_path", None):
+            return self._grid.video_path
         # 获取文件夹下的所有文件名
         if not folder_path:
             folder_path = self.folder + "/frames"